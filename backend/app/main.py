@@ -1,7 +1,12 @@
+import hashlib
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
+from starlette.datastructures import Headers, MutableHeaders
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -9,13 +14,21 @@ load_dotenv()
 
 from app.routes import health, upload, detection
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Release shared resources when the application shuts down."""
+    yield
+    await detection.close_http_client()
+
 # Create FastAPI instance
 app = FastAPI(
     title="FastAPI Backend Service",
     description="A FastAPI backend service with health check and file upload endpoints",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Add CORS middleware to allow frontend requests
@@ -27,31 +40,108 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# JSON listing endpoints polled by the frontend that support conditional GETs
+ETAG_PATHS = {"/api/uploads", "/api/uploads/metadata", "/uploads-metadata.json"}
+
+class ETagMiddleware:
+    """
+    Add an ETag to listing responses and answer a matching If-None-Match with 304.
+    
+    Clients polling unchanged listings then only receive the headers back
+    instead of the full JSON payload. Only GET requests to ETAG_PATHS are
+    buffered; every other request is passed straight through.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET" or scope["path"] not in ETAG_PATHS:
+            await self.app(scope, receive, send)
+            return
+        
+        start_message = None
+        body_parts = []
+        
+        async def send_with_etag(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+                # Error responses go out unchanged
+                if message["status"] != 200:
+                    await send(message)
+                return
+            
+            if message["type"] != "http.response.body" or start_message["status"] != 200:
+                await send(message)
+                return
+            
+            body_parts.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            
+            body = b"".join(body_parts)
+            # Weak ETag since the body may additionally be gzip-encoded on the way out
+            etag = f'W/"{hashlib.md5(body).hexdigest()}"'
+            
+            if_none_match = Headers(scope=scope).get("if-none-match", "")
+            if etag in [tag.strip() for tag in if_none_match.split(",")]:
+                await send({"type": "http.response.start", "status": 304, "headers": [(b"etag", etag.encode())]})
+                await send({"type": "http.response.body", "body": b""})
+                return
+            
+            headers = MutableHeaders(raw=list(start_message["headers"]))
+            headers["ETag"] = etag
+            await send({**start_message, "headers": headers.raw})
+            await send({"type": "http.response.body", "body": body})
+        
+        await self.app(scope, receive, send_with_etag)
+
+app.add_middleware(ETagMiddleware)
+
+class JSONGZipMiddleware(GZipMiddleware):
+    """GZip middleware that leaves the uploaded images, which are already compressed, untouched."""
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith("/uploads/"):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+# Compress JSON responses such as the upload listings and metadata
+app.add_middleware(JSONGZipMiddleware, minimum_size=1000)
+
 # Include routers
 app.include_router(health.router, tags=["Health"])
 app.include_router(upload.router, prefix="/api", tags=["Upload"])
 app.include_router(detection.router, prefix="/api", tags=["Detection"])
 
+class UploadStaticFiles(StaticFiles):
+    """
+    Static files for uploads, served with long-lived cache headers.
+    
+    Uploads are stored under their content hash, so a given URL always has the
+    same content and browsers can keep it without revalidating.
+    """
+    
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
+
 # Mount static files for uploaded images
 UPLOAD_DIR = Path("uploads")
 UPLOAD_DIR.mkdir(exist_ok=True)
-app.mount("/uploads", StaticFiles(directory=str(UPLOAD_DIR)), name="uploads")
+app.mount("/uploads", UploadStaticFiles(directory=str(UPLOAD_DIR)), name="uploads")
 
 # Mount the uploads-metadata.json file directly
-from fastapi import Response
-import json
+from app.utils.metadata import get_metadata
 
 @app.get("/uploads-metadata.json")
 async def get_uploads_metadata():
-    """Serve the uploads metadata JSON file."""
+    """Serve the uploads metadata JSON file (parsed once and cached until it changes)."""
     try:
-        metadata_file = Path("uploads-metadata.json")
-        if metadata_file.exists():
-            with open(metadata_file, 'r') as f:
-                metadata = json.load(f)
-            return metadata
-        else:
-            return {"uploads": []}
+        return get_metadata()
     except Exception as e:
         return {"uploads": [], "error": str(e)}
 
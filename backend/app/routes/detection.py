@@ -1,9 +1,13 @@
 import os
+import asyncio
+import hashlib
 import httpx
 import logging
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from ..utils.detection_cache import get_cached_detections, cache_detections
 
 router = APIRouter()
 
@@ -17,6 +21,70 @@ UPLOAD_DIR = Path("uploads")
 VISION_ENDPOINT = os.getenv("VISION_ENDPOINT")
 VISION_KEY = os.getenv("VISION_KEY")
 
+# Maximum number of in-flight requests to Azure Computer Vision
+try:
+    VISION_MAX_CONCURRENCY = int(os.getenv("VISION_MAX_CONCURRENCY", "8"))
+except ValueError:
+    VISION_MAX_CONCURRENCY = 0
+if VISION_MAX_CONCURRENCY < 1:
+    raise ValueError(
+        f"Unsupported VISION_MAX_CONCURRENCY {os.getenv('VISION_MAX_CONCURRENCY')!r}, expected an integer of at least 1"
+    )
+
+# Number of retries when Azure Computer Vision responds with 429 Too Many Requests
+VISION_MAX_RETRIES = 3
+
+# Longest wait in seconds before retrying, whatever Retry-After asks for
+VISION_MAX_RETRY_DELAY = 10.0
+
+# Created lazily so it is bound to the event loop serving requests
+_vision_semaphore: Optional[asyncio.Semaphore] = None
+
+# HTTP client shared across requests so connections to Azure are reused
+_http_client: Optional[httpx.AsyncClient] = None
+
+# Detections currently being computed, keyed by image content hash
+_pending_detections: Dict[str, asyncio.Task] = {}
+
+def get_vision_semaphore() -> asyncio.Semaphore:
+    """Return the semaphore that bounds concurrent Azure Computer Vision requests."""
+    global _vision_semaphore
+    if _vision_semaphore is None:
+        _vision_semaphore = asyncio.Semaphore(VISION_MAX_CONCURRENCY)
+    return _vision_semaphore
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared HTTP client used to call Azure Computer Vision."""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(timeout=30.0)
+    return _http_client
+
+async def close_http_client() -> None:
+    """Close the shared HTTP client, called when the application shuts down."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+def get_retry_delay(response: httpx.Response, attempt: int) -> float:
+    """
+    Get the delay before retrying a rate limited request.
+    
+    Uses the Retry-After header when Azure provides one, otherwise backs off
+    exponentially (1s, 2s, 4s, ...). The delay is capped at
+    VISION_MAX_RETRY_DELAY so a large Retry-After can't hold the request open.
+    """
+    try:
+        delay = float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        delay = float(2 ** attempt)
+    
+    # Negative and NaN values fall back to exponential backoff, inf is capped
+    if not delay >= 0:
+        delay = float(2 ** attempt)
+    return min(delay, VISION_MAX_RETRY_DELAY)
+
 def get_vision_api_url() -> str:
     """Construct the Azure Computer Vision API URL for v3.2 analyze."""
     if not VISION_ENDPOINT:
@@ -26,12 +94,12 @@ def get_vision_api_url() -> str:
     endpoint = VISION_ENDPOINT.rstrip('/')
     return f"{endpoint}/vision/v3.2/analyze?visualFeatures=Objects"
 
-async def call_azure_vision_api(image_path: Path) -> Dict[str, Any]:
+async def call_azure_vision_api(image_data: bytes) -> Dict[str, Any]:
     """
     Call Azure Computer Vision Object Detection API.
     
     Args:
-        image_path: Path to the image file
+        image_data: Content of the image file
         
     Returns:
         Dict containing the API response
@@ -58,22 +126,27 @@ async def call_azure_vision_api(image_path: Path) -> Dict[str, Any]:
             "Content-Type": "application/octet-stream"
         }
         
-        # Read image file
-        with open(image_path, "rb") as image_file:
-            image_data = image_file.read()
-        
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(api_url, headers=headers, content=image_data)
+        client = get_http_client()
+        for attempt in range(VISION_MAX_RETRIES + 1):
+            async with get_vision_semaphore():
+                response = await client.post(api_url, headers=headers, content=image_data)
             
-            if response.status_code != 200:
-                logger.error(f"Azure Vision API error: {response.status_code} - {response.text}")
-                raise HTTPException(
-                    status_code=502,
-                    detail=f"Azure Vision API error: {response.status_code}"
-                )
-            
-            return response.json()
+            if response.status_code != 429 or attempt == VISION_MAX_RETRIES:
+                break
             
+            delay = get_retry_delay(response, attempt)
+            logger.warning(f"Azure Vision API rate limited, retrying in {delay}s")
+            await asyncio.sleep(delay)
+        
+        if response.status_code != 200:
+            logger.error(f"Azure Vision API error: {response.status_code} - {response.text}")
+            raise HTTPException(
+                status_code=502,
+                detail=f"Azure Vision API error: {response.status_code}"
+            )
+        
+        return response.json()
+        
     except httpx.RequestError as e:
         logger.error(f"Network error calling Azure Vision API: {str(e)}")
         raise HTTPException(
@@ -110,6 +183,9 @@ def normalize_detection_response(api_response: Dict[str, Any]) -> Dict[str, List
         
     Returns:
         Normalized response with boxes array
+        
+    Raises:
+        Exception: If the response can't be normalized, e.g. for a zero image size
     """
     try:
         boxes = []
@@ -147,7 +223,63 @@ def normalize_detection_response(api_response: Dict[str, Any]) -> Dict[str, List
         
     except Exception as e:
         logger.error(f"Error normalizing detection response: {str(e)}")
+        raise
+
+def read_image(image_path: Path) -> Tuple[bytes, str]:
+    """
+    Read an image and compute the MD5 hash of its content.
+    
+    This does blocking file I/O and hashing and is meant to run in a worker thread.
+    
+    Args:
+        image_path: Path of the stored image
+        
+    Returns:
+        Tuple of the image content and its MD5 hash
+    """
+    image_data = image_path.read_bytes()
+    return image_data, hashlib.md5(image_data).hexdigest()
+
+async def run_detection(content_hash: str, image_data: bytes) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Call Azure Computer Vision for an image and cache the normalized result.
+    
+    Args:
+        content_hash: MD5 hash of the image content
+        image_data: Content of the image file
+        
+    Returns:
+        Normalized response with boxes array
+    """
+    api_response = await call_azure_vision_api(image_data)
+    try:
+        normalized_response = normalize_detection_response(api_response)
+    except Exception:
+        # Not cached, so the image is analysed again on the next request
         return {"boxes": []}
+    await run_in_threadpool(cache_detections, content_hash, normalized_response)
+    return normalized_response
+
+async def detect_objects(content_hash: str, image_data: bytes) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Get detections for an image, sharing a single Azure call between concurrent
+    requests for the same image content.
+    
+    Args:
+        content_hash: MD5 hash of the image content
+        image_data: Content of the image file
+        
+    Returns:
+        Normalized response with boxes array
+    """
+    task = _pending_detections.get(content_hash)
+    if task is None:
+        task = asyncio.ensure_future(run_detection(content_hash, image_data))
+        _pending_detections[content_hash] = task
+        task.add_done_callback(lambda _: _pending_detections.pop(content_hash, None))
+    
+    # Shield so a disconnecting client doesn't cancel the call for the other waiters
+    return await asyncio.shield(task)
 
 @router.get("/detections/{image_id}")
 async def get_detections(image_id: str):
@@ -186,11 +318,17 @@ async def get_detections(image_id: str):
                 detail=f"Image not found: {image_id}"
             )
         
-        # Call Azure Computer Vision API
-        api_response = await call_azure_vision_api(image_path)
+        # Read and hash the image in a worker thread so neither blocks the event loop
+        image_data, content_hash = await run_in_threadpool(read_image, image_path)
         
-        # Normalize the response
-        normalized_response = normalize_detection_response(api_response)
+        # Reuse detections for identical image content
+        cached_response = await run_in_threadpool(get_cached_detections, content_hash)
+        if cached_response is not None:
+            logger.info(f"Using cached detections for image: {image_id}")
+            return cached_response
+        
+        # Call Azure Computer Vision API and normalize the response
+        normalized_response = await detect_objects(content_hash, image_data)
         
         logger.info(f"Successfully processed detections for image: {image_id}")
         return normalized_response
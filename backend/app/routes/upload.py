@@ -1,11 +1,15 @@
 from fastapi import APIRouter, File, UploadFile, HTTPException
-from typing import List
+from fastapi.concurrency import run_in_threadpool
+from typing import BinaryIO, List, Optional, Tuple
 from pydantic import BaseModel
+import asyncio
 import hashlib
 import os
 from pathlib import Path
 import shutil
-from ..utils.metadata import add_upload_metadata, remove_upload_metadata, get_all_uploads_metadata, update_objects_metadata
+import tempfile
+import time
+from ..utils.metadata import add_upload_metadata, add_upload_metadata_bulk, remove_upload_metadata_bulk, get_all_uploads_metadata, update_objects_metadata
 
 router = APIRouter()
 
@@ -13,6 +17,23 @@ router = APIRouter()
 UPLOAD_DIR = Path("uploads")
 UPLOAD_DIR.mkdir(exist_ok=True)
 
+# Uploads are hashed and written to disk in chunks of this size
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Prefix of the temporary files uploads are streamed into before being renamed
+TEMP_FILE_PREFIX = ".upload-"
+
+# Maximum number of files from one request that are saved at the same time
+MAX_CONCURRENT_UPLOADS = 8
+
+# Hash algorithm used for content-addressed filenames ("md5" or "blake2b")
+UPLOAD_HASH_ALGORITHM = os.getenv("UPLOAD_HASH_ALGORITHM", "md5").lower()
+if UPLOAD_HASH_ALGORITHM not in ("md5", "blake2b"):
+    raise ValueError(f"Unsupported UPLOAD_HASH_ALGORITHM {UPLOAD_HASH_ALGORITHM!r}, expected 'md5' or 'blake2b'")
+
+# Last uploads directory listing as (directory mtime in ns, files)
+_upload_dir_cache: Optional[tuple] = None
+
 class DeleteFilesRequest(BaseModel):
     filenames: List[str]
 
@@ -20,59 +41,123 @@ class UpdateObjectsRequest(BaseModel):
     stored_filename: str
     objects: List[dict]
 
-def calculate_md5(content: bytes) -> str:
-    """Calculate MD5 hash of file content."""
-    return hashlib.md5(content).hexdigest()
+def new_content_hasher():
+    """
+    Create the hasher used to derive content-addressed filenames.
+    
+    BLAKE2b with a 16-byte digest is faster than MD5 on 64-bit CPUs and keeps
+    the 32-character hex filenames. MD5 stays the default so that new uploads
+    keep deduplicating against files stored under their MD5 names.
+    """
+    if UPLOAD_HASH_ALGORITHM == "blake2b":
+        return hashlib.blake2b(digest_size=16)
+    return hashlib.md5()
+
+def pluralize(count: int, noun: str) -> str:
+    """Format a count with a noun, e.g. "1 file" or "3 files"."""
+    return f"{count} {noun}" if count == 1 else f"{count} {noun}s"
 
 def get_file_extension(filename: str) -> str:
     """Extract file extension from filename."""
-    return Path(filename).suffix.lower()
+    # Same rules as Path.suffix, without building a Path per upload
+    name = filename.rpartition("/")[2]
+    i = name.rfind(".")
+    return name[i:].lower() if 0 < i < len(name) - 1 else ""
 
-async def save_file(file: UploadFile, content: bytes) -> dict:
+def save_file_sync(source: BinaryIO, filename: str, content_type: Optional[str], record_metadata: bool = True) -> dict:
     """
-    Save file with MD5 hash as filename and return file info.
+    Stream file to disk with its content hash as filename and return file info.
+    
+    The source is read in chunks which are hashed and written to a temporary
+    file in a single pass, so memory usage does not grow with the file size.
+    The temporary file is then renamed to the hash-based filename, or discarded
+    if a file with the same content is already stored.
+    
+    This does blocking file I/O and is meant to run in a worker thread.
     
     Args:
-        file: The uploaded file object
-        content: File content bytes
+        source: Binary file object with the uploaded content
+        filename: Original name of the uploaded file
+        content_type: Content type reported for the upload
+        record_metadata: Whether to add the upload to the metadata file, callers
+                         saving several files can add them in bulk instead
     
     Returns:
         dict: File information including saved path and hash
     """
-    # Calculate MD5 hash
-    file_hash = calculate_md5(content)
+    hasher = new_content_hasher()
+    file_size = 0
+    
+    # Stream into a temporary file since the final name depends on the content hash
+    temp_file = tempfile.NamedTemporaryFile(dir=UPLOAD_DIR, prefix=TEMP_FILE_PREFIX, delete=False)
+    try:
+        with temp_file:
+            while chunk := source.read(UPLOAD_CHUNK_SIZE):
+                hasher.update(chunk)
+                temp_file.write(chunk)
+                file_size += len(chunk)
+        os.chmod(temp_file.name, 0o644)
+    except Exception:
+        os.unlink(temp_file.name)
+        raise
+    
+    file_hash = hasher.hexdigest()
     
     # Get file extension
-    file_extension = get_file_extension(file.filename)
+    file_extension = get_file_extension(filename)
     
-    # Create filename with MD5 hash + extension
+    # Create filename with content hash + extension
     hashed_filename = f"{file_hash}{file_extension}"
-    file_path = UPLOAD_DIR / hashed_filename
+    file_path = os.path.join(UPLOAD_DIR, hashed_filename)
     
     # Check if file already exists (deduplication)
-    file_exists = file_path.exists()
+    try:
+        existing_size = os.stat(file_path).st_size
+    except FileNotFoundError:
+        existing_size = None
+    is_duplicate = existing_size == file_size
     
-    # Save file (will overwrite if exists)
-    with open(file_path, "wb") as buffer:
-        buffer.write(content)
+    if is_duplicate:
+        # Same content is already stored, so the copy just written is discarded
+        os.unlink(temp_file.name)
+    else:
+        # New file, or a stored copy with the wrong size that needs replacing
+        os.replace(temp_file.name, file_path)
     
     # Add metadata for the uploaded file
-    add_upload_metadata(
-        original_filename=file.filename,
-        stored_filename=hashed_filename,
-        file_size=len(content)
-    )
+    if record_metadata:
+        add_upload_metadata(
+            original_filename=filename,
+            stored_filename=hashed_filename,
+            file_size=file_size
+        )
     
     return {
-        "original_filename": file.filename,
+        "original_filename": filename,
         "saved_filename": hashed_filename,
-        "file_path": str(file_path),
+        "file_path": file_path,
         "file_hash": file_hash,
-        "size": len(content),
-        "content_type": file.content_type,
-        "was_duplicate": file_exists
+        "size": file_size,
+        "content_type": content_type,
+        "was_duplicate": is_duplicate
     }
 
+async def save_file(file: UploadFile, record_metadata: bool = True) -> dict:
+    """
+    Save an uploaded file with its content hash as filename and return file info.
+    
+    Hashing and writing run in a worker thread so large uploads don't block
+    the event loop.
+    
+    Args:
+        file: The uploaded file object
+        record_metadata: Whether to add the upload to the metadata file
+    
+    Returns:
+        dict: File information including saved path and hash
+    """
+    return await run_in_threadpool(save_file_sync, file.file, file.filename, file.content_type, record_metadata)
+
 @router.post("/upload")
 async def upload_file(files: List[UploadFile] = File(...)):
     """
@@ -80,7 +165,7 @@ async def upload_file(files: List[UploadFile] = File(...)):
     and returns file information. Supports both single file and files[] format from multipart/form-data.
     
     Files are saved in the 'uploads' directory with MD5 hash as filename to prevent duplicates.
-    If a file with the same content already exists, it will be overwritten.
+    If a file with the same content already exists, the stored copy is kept and only its metadata is updated.
     
     Args:
         files: The uploaded file(s) (multipart/form-data)
@@ -94,29 +179,36 @@ async def upload_file(files: List[UploadFile] = File(...)):
     if not files:
         raise HTTPException(status_code=400, detail="No files provided")
 
-    uploaded_files = []
-    total_size = 0
-    duplicates_count = 0
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_UPLOADS)
+
+    async def save_one(file: UploadFile) -> dict:
+        async with semaphore:
+            # Stream file to disk with MD5 hash filename, metadata is added below
+            return await save_file(file, record_metadata=False)
 
     try:
-        for file in files:
-            if not file.filename:
-                continue  # Skip files without filenames
-            
-            # Read the file content
-            content = await file.read()
-            file_size = len(content)
-            total_size += file_size
-            
-            # Save file with MD5 hash filename
-            file_info = await save_file(file, content)
-            uploaded_files.append(file_info)
-            
-            if file_info["was_duplicate"]:
-                duplicates_count += 1
-            
-            # Reset file pointer if needed for further processing
-            await file.seek(0)
+        # Save files concurrently, skipping files without filenames
+        results = await asyncio.gather(*(save_one(file) for file in files if file.filename), return_exceptions=True)
+        uploaded_files = [result for result in results if not isinstance(result, BaseException)]
+        
+        # Record the saved uploads with a single metadata write, also when another
+        # file failed, so that no stored file is left without metadata
+        if uploaded_files:
+            await run_in_threadpool(add_upload_metadata_bulk, [
+                {
+                    "original_filename": file_info["original_filename"],
+                    "stored_filename": file_info["saved_filename"],
+                    "file_size": file_info["size"]
+                }
+                for file_info in uploaded_files
+            ])
+        
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        
+        total_size = sum(file_info["size"] for file_info in uploaded_files)
+        duplicates_count = sum(1 for file_info in uploaded_files if file_info["was_duplicate"])
         
         if not uploaded_files:
             raise HTTPException(status_code=400, detail="No valid files were uploaded")
@@ -127,8 +219,8 @@ async def upload_file(files: List[UploadFile] = File(...)):
             "total_size": total_size,
             "duplicates_count": duplicates_count,
             "upload_directory": str(UPLOAD_DIR),
-            "message": f"Successfully uploaded {len(uploaded_files)} file{'s' if len(uploaded_files) > 1 else ''}" +
-                      (f" ({duplicates_count} duplicate{'s' if duplicates_count > 1 else ''} overwritten)" if duplicates_count > 0 else "")
+            "message": f"Successfully uploaded {pluralize(len(uploaded_files), 'file')}" +
+                      (f" ({pluralize(duplicates_count, 'duplicate')} already stored)" if duplicates_count > 0 else "")
         }
     
     except Exception as e:
@@ -154,6 +246,57 @@ async def upload_multiple_files(files: List[UploadFile] = File(...)):
     # Reuse the main upload function logic
     return await upload_file(files)
 
+def scan_upload_dir() -> List[dict]:
+    """
+    Collect information about the files in the uploads directory.
+    
+    Uses os.scandir, whose entries carry the file type from the directory
+    listing, so each file costs a single stat call.
+    
+    Returns:
+        list: File information for each stored upload
+    """
+    files = []
+    with os.scandir(UPLOAD_DIR) as entries:
+        for entry in entries:
+            # Skip uploads that are still being streamed to disk
+            if entry.name.startswith(TEMP_FILE_PREFIX):
+                continue
+            if entry.is_file():
+                stat = entry.stat()
+                files.append({
+                    "filename": entry.name,
+                    "path": entry.path,
+                    "size": stat.st_size,
+                    "created": stat.st_ctime,
+                    "modified": stat.st_mtime
+                })
+    return files
+
+def get_upload_dir_listing() -> List[dict]:
+    """
+    Return the uploads directory listing, rescanning only when the directory changed.
+    
+    Adding, renaming or removing a file updates the directory's mtime, so the
+    previous scan is reused while it is unchanged. This also holds when other
+    worker processes modify the directory.
+    
+    Returns:
+        list: File information for each stored upload
+    """
+    global _upload_dir_cache
+    mtime_ns = os.stat(UPLOAD_DIR).st_mtime_ns
+    if _upload_dir_cache is not None and _upload_dir_cache[0] == mtime_ns:
+        return _upload_dir_cache[1]
+    
+    files = scan_upload_dir()
+    
+    # A change within the same timestamp tick as the scan would go unnoticed,
+    # so listings of a directory modified in the last second are not cached
+    if time.time_ns() - mtime_ns > 1_000_000_000:
+        _upload_dir_cache = (mtime_ns, files)
+    return files
+
 @router.get("/uploads")
 async def list_uploaded_files():
     """
@@ -171,23 +314,13 @@ async def list_uploaded_files():
                 "message": "No uploads directory found"
             }
         
-        files = []
-        for file_path in UPLOAD_DIR.iterdir():
-            if file_path.is_file():
-                stat = file_path.stat()
-                files.append({
-                    "filename": file_path.name,
-                    "path": str(file_path),
-                    "size": stat.st_size,
-                    "created": stat.st_ctime,
-                    "modified": stat.st_mtime
-                })
+        files = await run_in_threadpool(get_upload_dir_listing)
         
         return {
             "files": files,
             "total_files": len(files),
             "upload_directory": str(UPLOAD_DIR),
-            "message": f"Found {len(files)} uploaded file{'s' if len(files) != 1 else ''}"
+            "message": f"Found {pluralize(len(files), 'uploaded file')}"
         }
     
     except Exception as e:
@@ -208,7 +341,7 @@ async def get_uploads_metadata():
         return {
             "uploads": metadata_records,
             "total_uploads": len(metadata_records),
-            "message": f"Found metadata for {len(metadata_records)} uploaded file{'s' if len(metadata_records) != 1 else ''}"
+            "message": f"Found metadata for {pluralize(len(metadata_records), 'uploaded file')}"
         }
     
     except Exception as e:
@@ -226,7 +359,8 @@ async def update_upload_objects_metadata(request: UpdateObjectsRequest):
         dict: Success or error message
     """
     try:
-        success = update_objects_metadata(request.stored_filename, request.objects)
+        # The metadata update takes a thread lock and rewrites the file, so keep it off the event loop
+        success = await run_in_threadpool(update_objects_metadata, request.stored_filename, request.objects)
         
         if success:
             return {
@@ -244,6 +378,46 @@ async def update_upload_objects_metadata(request: UpdateObjectsRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error updating objects metadata: {str(e)}")
 
+def delete_files_sync(filenames: List[str]) -> Tuple[List[str], List[str], List[str]]:
+    """
+    Delete stored uploads and remove their metadata.
+    
+    This does blocking file I/O and takes the metadata lock, so it is meant to
+    run in a worker thread.
+    
+    Args:
+        filenames: Stored filenames to delete
+    
+    Returns:
+        tuple: Lists of deleted filenames, filenames that were not found, and error messages
+    """
+    deleted_files = []
+    not_found_files = []
+    errors = []
+    
+    for filename in filenames:
+        file_path = os.path.join(UPLOAD_DIR, filename)
+        
+        # Unlink directly and classify failures, instead of stat-ing first
+        try:
+            os.unlink(file_path)
+            deleted_files.append(filename)
+        except FileNotFoundError:
+            not_found_files.append(filename)
+        except IsADirectoryError:
+            errors.append(f"{filename} is not a file")
+        except Exception as e:
+            errors.append(f"Error deleting {filename}: {str(e)}")
+    
+    # Remove metadata for all deleted files with a single metadata write
+    if deleted_files:
+        try:
+            remove_upload_metadata_bulk(deleted_files)
+        except Exception as e:
+            errors.append(f"Error removing metadata: {str(e)}")
+    
+    return deleted_files, not_found_files, errors
+
 @router.delete("/uploads")
 async def delete_files(request: DeleteFilesRequest):
     """
@@ -262,37 +436,16 @@ async def delete_files(request: DeleteFilesRequest):
         if not UPLOAD_DIR.exists():
             raise HTTPException(status_code=404, detail="Uploads directory not found")
         
-        deleted_files = []
-        not_found_files = []
-        errors = []
-        
-        for filename in request.filenames:
-            file_path = UPLOAD_DIR / filename
-            
-            if not file_path.exists():
-                not_found_files.append(filename)
-                continue
-            
-            if not file_path.is_file():
-                errors.append(f"{filename} is not a file")
-                continue
-            
-            try:
-                os.remove(file_path)
-                deleted_files.append(filename)
-                # Remove metadata for the deleted file
-                remove_upload_metadata(filename)
-            except Exception as e:
-                errors.append(f"Error deleting {filename}: {str(e)}")
+        deleted_files, not_found_files, errors = await run_in_threadpool(delete_files_sync, request.filenames)
         
         # Build response message
         messages = []
         if deleted_files:
-            messages.append(f"Successfully deleted {len(deleted_files)} file{'s' if len(deleted_files) != 1 else ''}")
+            messages.append(f"Successfully deleted {pluralize(len(deleted_files), 'file')}")
         if not_found_files:
-            messages.append(f"{len(not_found_files)} file{'s' if len(not_found_files) != 1 else ''} not found")
+            messages.append(f"{pluralize(len(not_found_files), 'file')} not found")
         if errors:
-            messages.append(f"{len(errors)} error{'s' if len(errors) != 1 else ''} occurred")
+            messages.append(f"{pluralize(len(errors), 'error')} occurred")
         
         # If there were errors but some files were deleted, return 207 (Multi-Status)
         status_code = 200
@@ -0,0 +1,80 @@
+"""
+Cache of object detection results for uploaded images.
+
+This module persists normalized detection results in detections-cache.json,
+keyed by the MD5 hash of the image content, so analysing the same image again
+(for example after a re-upload) does not call Azure Computer Vision twice.
+The cache keeps the most recently added DETECTION_CACHE_MAX_ENTRIES results.
+"""
+
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+from .json_files import load_json_cached, write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+# Path to the detection cache file
+DETECTION_CACHE_FILE_PATH = Path("detections-cache.json")
+
+# Number of images whose detections are kept, older entries are dropped first
+DETECTION_CACHE_MAX_ENTRIES = 1000
+
+# Held while adding an entry, so concurrent writers don't drop each other's detections
+_cache_lock = threading.Lock()
+
+def get_detection_cache() -> Dict[str, Any]:
+    """
+    Read and return the cached detections from the JSON file.
+
+    The parsed file is reused until it changes. The returned dictionary is
+    shared between callers and must not be modified.
+
+    Returns:
+        dict: Mapping of content hash to normalized detections, or empty dict if file doesn't exist
+    """
+    # An unreadable cache is treated as empty and rebuilt on the next write
+    return load_json_cached(DETECTION_CACHE_FILE_PATH, {})
+
+def get_cached_detections(content_hash: str) -> Optional[Dict[str, Any]]:
+    """
+    Get cached detections for an image.
+
+    Args:
+        content_hash: MD5 hash of the image content
+
+    Returns:
+        dict or None: The normalized detections if cached, None otherwise
+    """
+    return get_detection_cache().get(content_hash)
+
+def cache_detections(content_hash: str, detections: Dict[str, Any]) -> None:
+    """
+    Store normalized detections for an image.
+
+    Once the cache holds DETECTION_CACHE_MAX_ENTRIES images, the oldest
+    entries are dropped. Failing to write the cache is logged and otherwise
+    ignored, since the detections can always be recomputed.
+
+    Args:
+        content_hash: MD5 hash of the image content
+        detections: Normalized detection response with boxes array
+    """
+    with _cache_lock:
+        # Entries are never modified once cached, so a shallow copy of the shared cache is enough
+        cache = dict(get_detection_cache())
+        cache.pop(content_hash, None)
+        cache[content_hash] = detections
+
+        # Dicts and the JSON file keep insertion order, so the oldest entries come first
+        excess = len(cache) - DETECTION_CACHE_MAX_ENTRIES
+        if excess > 0:
+            for stale_hash in list(cache)[:excess]:
+                del cache[stale_hash]
+
+        try:
+            # Not indented, the file is only read back by this module
+            write_json_atomic(DETECTION_CACHE_FILE_PATH, cache, indent=False)
+        except IOError as e:
+            logger.warning(f"Error saving detection cache: {str(e)}")
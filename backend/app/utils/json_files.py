@@ -0,0 +1,94 @@
+"""
+Reading and writing of the JSON files the application keeps on disk.
+
+Both uploads-metadata.json and detections-cache.json are read far more often
+than they change and are rewritten as a whole on every update, so they share
+a parse cache and an atomic write.
+"""
+
+import orjson
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+# Parsed files as {absolute path: ((mtime in ns, size), data)}, reused while a file is unchanged
+_json_cache: Dict[str, tuple] = {}
+
+def read_json_file(path: Path, default: Any) -> Any:
+    """
+    Parse a JSON file, bypassing the cache.
+
+    Args:
+        path: The JSON file to read
+        default: Value returned if the file is missing or can't be parsed
+
+    Returns:
+        The freshly parsed data, which the caller may modify, or default
+    """
+    try:
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    except (orjson.JSONDecodeError, IOError):
+        return default
+
+def load_json_cached(path: Path, default: Any) -> Any:
+    """
+    Parse a JSON file, reusing the previous parse while the file is unchanged.
+
+    The parse is cached under the file's absolute path and checked against its
+    mtime and size, so writes by other threads or processes are picked up on
+    the next call. The returned data is shared between callers and must not be
+    modified.
+
+    Args:
+        path: The JSON file to read
+        default: Value returned if the file is missing or can't be parsed
+
+    Returns:
+        The parsed data, or default
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return default
+
+    cache_path = os.path.abspath(path)
+    cache_key = (stat.st_mtime_ns, stat.st_size)
+    cached = _json_cache.get(cache_path)
+    if cached is not None and cached[0] == cache_key:
+        return cached[1]
+
+    data = read_json_file(path, default)
+
+    # A rewrite within the same timestamp tick could keep the same key, so
+    # files modified in the last second are not cached
+    if time.time_ns() - stat.st_mtime_ns > 1_000_000_000:
+        _json_cache[cache_path] = (cache_key, data)
+    return data
+
+def write_json_atomic(path: Path, data: Any, indent: bool = True) -> None:
+    """
+    Write data to a JSON file, replacing the file atomically.
+
+    The JSON is written to a temporary file in the same directory which then
+    replaces the target, so readers never see a partially written file.
+
+    Args:
+        path: The JSON file to write
+        data: The data to serialize
+        indent: Whether to indent the JSON for readability
+
+    Raises:
+        IOError: If the file can't be written
+    """
+    temp_file = tempfile.NamedTemporaryFile(dir=path.parent, prefix=f".{path.name}-", delete=False)
+    try:
+        with temp_file:
+            temp_file.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0))
+        os.chmod(temp_file.name, 0o644)
+        os.replace(temp_file.name, path)
+    except Exception:
+        os.unlink(temp_file.name)
+        raise
@@ -6,37 +6,49 @@ that stores information about uploaded files including original filename,
 stored filename, upload timestamp, and file size.
 """
 
-import json
-import os
+import threading
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional
 from fastapi import HTTPException
+from .json_files import load_json_cached, read_json_file, write_json_atomic
 
 # Path to the metadata file
 METADATA_FILE_PATH = Path("uploads-metadata.json")
 
+# Serializes read-modify-write updates, which may run concurrently in worker threads
+_metadata_lock = threading.Lock()
+
+def read_metadata_file() -> Dict:
+    """
+    Parse the metadata JSON file, bypassing the cache.
+    
+    Returns:
+        dict: A freshly parsed metadata dictionary that the caller may modify,
+              or empty structure if the file doesn't exist
+    """
+    # If the file is missing or can't be read, start from an empty structure
+    return read_json_file(METADATA_FILE_PATH, {"uploads": []})
+
 def get_metadata() -> Dict:
     """
     Read and return the current metadata from the JSON file.
     
+    The parsed metadata is cached and reused while the file's mtime and size
+    are unchanged, so repeated listings don't parse the file again. The
+    returned dictionary is shared between callers and must not be modified.
+    
     Returns:
         dict: The metadata dictionary, or empty dict if file doesn't exist
     """
-    try:
-        if METADATA_FILE_PATH.exists():
-            with open(METADATA_FILE_PATH, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        else:
-            return {"uploads": []}
-    except (json.JSONDecodeError, IOError) as e:
-        # If there's an error reading the file, create a new empty structure
-        return {"uploads": []}
+    return load_json_cached(METADATA_FILE_PATH, {"uploads": []})
 
 def save_metadata(metadata: Dict) -> None:
     """
     Save the metadata dictionary to the JSON file.
     
+    The file is replaced atomically, so readers never see a partial write.
+    
     Args:
         metadata: The metadata dictionary to save
     
@@ -44,8 +56,7 @@ def save_metadata(metadata: Dict) -> None:
         HTTPException: If there's an error saving the file
     """
     try:
-        with open(METADATA_FILE_PATH, 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, indent=2, ensure_ascii=False)
+        write_json_atomic(METADATA_FILE_PATH, metadata)
     except IOError as e:
         raise HTTPException(status_code=500, detail=f"Error saving metadata: {str(e)}")
 
@@ -59,31 +70,53 @@ def add_upload_metadata(original_filename: str, stored_filename: str, file_size:
         file_size: Size of the file in bytes
         objects: List of detected objects from object detection API (optional)
     """
-    metadata = get_metadata()
-    
-    upload_record = {
+    add_upload_metadata_bulk([{
         "original_filename": original_filename,
         "stored_filename": stored_filename,
-        "uploaded_time": datetime.now().isoformat(),
         "file_size": file_size,
-        "objects": objects or []
-    }
+        "objects": objects
+    }])
+
+def add_upload_metadata_bulk(records: List[Dict]) -> None:
+    """
+    Add metadata for several newly uploaded files with a single write.
     
-    # Check if this file already exists in metadata (by stored_filename)
-    existing_index = None
-    for i, record in enumerate(metadata["uploads"]):
-        if record["stored_filename"] == stored_filename:
-            existing_index = i
-            break
+    Args:
+        records: Dictionaries with original_filename, stored_filename, file_size
+                 and optionally objects, as accepted by add_upload_metadata
+    """
+    if not records:
+        return
     
-    if existing_index is not None:
-        # Update existing record (in case of overwrite)
-        metadata["uploads"][existing_index] = upload_record
-    else:
-        # Add new record
-        metadata["uploads"].append(upload_record)
+    uploaded_time = datetime.now().isoformat()
     
-    save_metadata(metadata)
+    with _metadata_lock:
+        metadata = read_metadata_file()
+        
+        # Position of each stored filename in the uploads list
+        index_by_filename = {}
+        for i, record in enumerate(metadata["uploads"]):
+            index_by_filename.setdefault(record["stored_filename"], i)
+        
+        for record in records:
+            upload_record = {
+                "original_filename": record["original_filename"],
+                "stored_filename": record["stored_filename"],
+                "uploaded_time": uploaded_time,
+                "file_size": record["file_size"],
+                "objects": record.get("objects") or []
+            }
+            
+            existing_index = index_by_filename.get(upload_record["stored_filename"])
+            if existing_index is not None:
+                # Update existing record (in case of overwrite)
+                metadata["uploads"][existing_index] = upload_record
+            else:
+                # Add new record
+                index_by_filename[upload_record["stored_filename"]] = len(metadata["uploads"])
+                metadata["uploads"].append(upload_record)
+        
+        save_metadata(metadata)
 
 def remove_upload_metadata(stored_filename: str) -> bool:
     """
@@ -95,16 +128,41 @@ def remove_upload_metadata(stored_filename: str) -> bool:
     Returns:
         bool: True if the record was found and removed, False otherwise
     """
-    metadata = get_metadata()
+    with _metadata_lock:
+        metadata = read_metadata_file()
+        
+        # Find and remove the record
+        for i, record in enumerate(metadata["uploads"]):
+            if record["stored_filename"] == stored_filename:
+                del metadata["uploads"][i]
+                save_metadata(metadata)
+                return True
+        
+        return False
+
+def remove_upload_metadata_bulk(stored_filenames: List[str]) -> int:
+    """
+    Remove metadata for several deleted files with a single write.
     
-    # Find and remove the record
-    for i, record in enumerate(metadata["uploads"]):
-        if record["stored_filename"] == stored_filename:
-            del metadata["uploads"][i]
-            save_metadata(metadata)
-            return True
+    Args:
+        stored_filenames: The stored filenames to remove from metadata
+        
+    Returns:
+        int: Number of records that were found and removed
+    """
+    names = set(stored_filenames)
     
-    return False
+    with _metadata_lock:
+        metadata = read_metadata_file()
+        
+        remaining = [record for record in metadata["uploads"] if record["stored_filename"] not in names]
+        removed_count = len(metadata["uploads"]) - len(remaining)
+        
+        if removed_count:
+            metadata["uploads"] = remaining
+            save_metadata(metadata)
+        
+        return removed_count
 
 def get_file_metadata(stored_filename: str) -> Optional[Dict]:
     """
@@ -135,16 +193,17 @@ def update_objects_metadata(stored_filename: str, objects: List[Dict]) -> bool:
     Returns:
         bool: True if the record was found and updated, False otherwise
     """
-    metadata = get_metadata()
-    
-    # Find and update the record
-    for record in metadata["uploads"]:
-        if record["stored_filename"] == stored_filename:
-            record["objects"] = objects
-            save_metadata(metadata)
-            return True
-    
-    return False
+    with _metadata_lock:
+        metadata = read_metadata_file()
+        
+        # Find and update the record
+        for record in metadata["uploads"]:
+            if record["stored_filename"] == stored_filename:
+                record["objects"] = objects
+                save_metadata(metadata)
+                return True
+        
+        return False
 
 def get_all_uploads_metadata() -> List[Dict]:
     """
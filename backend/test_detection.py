@@ -4,8 +4,16 @@ Test script for the detection endpoint implementation.
 This tests the core normalization logic.
 """
 
+import asyncio
+import hashlib
 import json
 
+import httpx
+
+from app.routes import detection
+from app.utils import detection_cache
+from testing_helpers import backdate, temp_storage
+
 def normalize_detection_response(api_response):
     """
     Normalize Azure Computer Vision API response to the expected format.
@@ -110,6 +118,121 @@ def test_error_scenarios():
     
     print("✅ Error scenario tests passed!")
 
+def test_detection_cache():
+    """Test that cached detections are reused until the cache file changes."""
+    with temp_storage():
+        assert detection_cache.get_cached_detections("abc") is None
+        
+        detection_cache.cache_detections("abc", {"boxes": [{"label": "cat"}]})
+        
+        backdate(detection_cache.DETECTION_CACHE_FILE_PATH)
+        cached = detection_cache.get_detection_cache()
+        assert cached is detection_cache.get_detection_cache()
+        assert detection_cache.get_cached_detections("abc") == {"boxes": [{"label": "cat"}]}
+        
+        # A write after the cached read is seen, and the shared dict is left untouched
+        detection_cache.cache_detections("def", {"boxes": []})
+        assert "def" not in cached
+        assert detection_cache.get_cached_detections("def") == {"boxes": []}
+        assert detection_cache.get_cached_detections("abc") == {"boxes": [{"label": "cat"}]}
+    
+    print("✅ Detection cache test passed!")
+
+def test_detection_cache_bound():
+    """Test that the detection cache drops its oldest entries once full."""
+    original_max_entries = detection_cache.DETECTION_CACHE_MAX_ENTRIES
+    
+    with temp_storage():
+        detection_cache.DETECTION_CACHE_MAX_ENTRIES = 3
+        try:
+            for content_hash in ["a", "b", "c", "d"]:
+                detection_cache.cache_detections(content_hash, {"boxes": []})
+            assert list(detection_cache.get_detection_cache()) == ["b", "c", "d"]
+            
+            # Caching an image again makes it the newest entry
+            detection_cache.cache_detections("b", {"boxes": []})
+            detection_cache.cache_detections("e", {"boxes": []})
+            assert list(detection_cache.get_detection_cache()) == ["d", "b", "e"]
+        finally:
+            detection_cache.DETECTION_CACHE_MAX_ENTRIES = original_max_entries
+    
+    print("✅ Detection cache bound test passed!")
+
+def test_failed_normalization_not_cached():
+    """Test that a response which can't be normalized is not cached."""
+    original_call = detection.call_azure_vision_api
+    
+    async def zero_size_response(image_data):
+        return {"objects": [{"rectangle": {"x": 1}}], "metadata": {"width": 0, "height": 0}}
+    
+    with temp_storage():
+        detection.call_azure_vision_api = zero_size_response
+        try:
+            result = asyncio.run(detection.run_detection("abc", b"image"))
+            assert result == {"boxes": []}
+            assert detection_cache.get_cached_detections("abc") is None
+        finally:
+            detection.call_azure_vision_api = original_call
+    
+    print("✅ Failed normalization test passed!")
+
+def test_retry_delay():
+    """Test that Retry-After is honoured but capped."""
+    def delay_for(retry_after, attempt=1):
+        headers = {} if retry_after is None else {"Retry-After": retry_after}
+        return detection.get_retry_delay(httpx.Response(429, headers=headers), attempt)
+    
+    assert delay_for("3") == 3.0
+    assert delay_for(None, attempt=2) == 4.0
+    assert delay_for("soon") == 2.0
+    assert delay_for("-5") == 2.0
+    assert delay_for("nan") == 2.0
+    assert delay_for("86400") == detection.VISION_MAX_RETRY_DELAY
+    assert delay_for("inf") == detection.VISION_MAX_RETRY_DELAY
+    
+    print("✅ Retry delay test passed!")
+
+def test_concurrent_detections_share_one_call():
+    """Test that concurrent requests for one image make a single Azure call."""
+    originals = (detection.VISION_ENDPOINT, detection.VISION_KEY)
+    calls = []
+    
+    async def handler(request):
+        calls.append(request)
+        # Keep the call in flight so all requests arrive while it is pending
+        await asyncio.sleep(0.1)
+        return httpx.Response(200, json={
+            "objects": [{"rectangle": {"x": 100, "y": 50, "w": 200, "h": 150}, "object": "cat", "confidence": 0.9}],
+            "metadata": {"width": 800, "height": 600}
+        })
+    
+    async def run_requests():
+        detection._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        detection._vision_semaphore = None
+        try:
+            return await asyncio.gather(*(detection.get_detections("image") for _ in range(5)))
+        finally:
+            await detection.close_http_client()
+            detection._vision_semaphore = None
+    
+    with temp_storage():
+        detection.VISION_ENDPOINT = "https://vision.example.com/"
+        detection.VISION_KEY = "test-key"
+        (detection.UPLOAD_DIR / "image.jpg").write_bytes(b"image")
+        try:
+            results = asyncio.run(run_requests())
+            print(f"Azure calls for 5 concurrent requests: {len(calls)}")
+            assert len(calls) == 1
+            assert str(calls[0].url) == "https://vision.example.com/vision/v3.2/analyze?visualFeatures=Objects"
+            assert all(result == results[0] for result in results)
+            assert results[0]["boxes"][0]["label"] == "cat"
+            assert detection._pending_detections == {}
+            assert detection_cache.get_cached_detections(hashlib.md5(b"image").hexdigest()) == results[0]
+        finally:
+            detection.VISION_ENDPOINT, detection.VISION_KEY = originals
+    
+    print("✅ Concurrent detections test passed!")
+
 if __name__ == "__main__":
     print("Testing Detection Endpoint Implementation")
     print("=" * 50)
@@ -117,6 +240,11 @@ if __name__ == "__main__":
     try:
         test_normalize_detection_response()
         test_error_scenarios()
+        test_detection_cache()
+        test_detection_cache_bound()
+        test_failed_normalization_not_cached()
+        test_retry_delay()
+        test_concurrent_detections_share_one_call()
         
         print("\n" + "=" * 50)
         print("✅ All tests passed!")
@@ -0,0 +1,92 @@
+"""
+Test script for the application middleware.
+
+This script tests the ETag handling and gzip compression of the listing
+endpoints using the FastAPI test client, with temporary upload and metadata
+paths.
+"""
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routes import upload
+from app.utils import metadata
+from testing_helpers import temp_storage
+
+
+def test_etag_header():
+    """Test that listings get an ETag and a matching If-None-Match returns 304."""
+    with temp_storage() as temp_path:
+        client = TestClient(app)
+
+        response = client.get("/api/uploads")
+        etag = response.headers.get("etag")
+        print(f"GET /api/uploads: {response.status_code} ETag {etag}")
+        assert response.status_code == 200
+        assert etag is not None and etag.startswith('W/"')
+
+        # A matching If-None-Match, also within a list of tags, gets an empty 304
+        response = client.get("/api/uploads", headers={"If-None-Match": f'"other", {etag}'})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+        # A stale tag gets the full listing again
+        response = client.get("/api/uploads", headers={"If-None-Match": 'W/"stale"'})
+        assert response.status_code == 200
+        assert response.json()["total_files"] == 0
+
+        # Other methods, other paths and error responses pass through untouched
+        response = client.post("/api/uploads", headers={"If-None-Match": etag})
+        assert response.status_code == 405
+        assert "etag" not in response.headers
+
+        response = client.get("/", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert "etag" not in response.headers
+
+        # Listing a path that is not a directory fails with a 500
+        not_a_dir = temp_path / "not-a-dir"
+        not_a_dir.write_bytes(b"")
+        upload.UPLOAD_DIR = not_a_dir
+        response = client.get("/api/uploads", headers={"If-None-Match": etag})
+        assert response.status_code == 500
+        assert "etag" not in response.headers
+
+    print("✅ ETag header test passed!")
+
+
+def test_etag_with_gzip():
+    """Test that gzip-encoded listings keep a weak ETag that still matches."""
+    with temp_storage():
+        # Enough records for the response to pass the gzip minimum size
+        metadata.add_upload_metadata_bulk([
+            {"original_filename": f"image-{i}.jpg", "stored_filename": f"{i:032x}.jpg", "file_size": i}
+            for i in range(20)
+        ])
+        client = TestClient(app)
+
+        response = client.get("/uploads-metadata.json", headers={"Accept-Encoding": "gzip"})
+        etag = response.headers.get("etag")
+        print(f"GET /uploads-metadata.json: {response.headers.get('content-encoding')} ETag {etag}")
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert etag.startswith('W/"')
+        assert len(response.json()["uploads"]) == 20
+
+        # The same tag is issued for the uncompressed body
+        response = client.get("/uploads-metadata.json", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in response.headers
+        assert response.headers["etag"] == etag
+
+        # And it validates a gzip request
+        response = client.get("/uploads-metadata.json", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+
+    print("✅ ETag with gzip test passed!")
+
+
+if __name__ == "__main__":
+    test_etag_header()
+    test_etag_with_gzip()
@@ -7,6 +7,7 @@ This script tests the metadata utility functions to ensure they work correctly.
 import sys
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Add the app directory to Python path to import modules
@@ -14,12 +15,16 @@ sys.path.append(str(Path(__file__).parent / "app"))
 
 from app.utils.metadata import (
     add_upload_metadata, 
+    add_upload_metadata_bulk,
     get_metadata, 
     get_file_metadata, 
     get_all_uploads_metadata,
     remove_upload_metadata,
+    remove_upload_metadata_bulk,
     METADATA_FILE_PATH
 )
+from app.utils import metadata
+from testing_helpers import backdate, temp_storage
 
 def test_metadata_functionality():
     """Test the metadata functionality."""
@@ -74,8 +79,26 @@ def test_metadata_functionality():
     result = remove_upload_metadata("nonexistent.jpg")
     print(f"Remove result for nonexistent.jpg: {result}")
     
+    # Test 8: Add several files at once
+    print("\n8. Testing add_upload_metadata_bulk...")
+    add_upload_metadata_bulk([
+        {"original_filename": "third-image.jpg", "stored_filename": "ghi789.jpg", "file_size": 512},
+        {"original_filename": "another-copy.png", "stored_filename": "def456.png", "file_size": 2048}
+    ])
+    all_uploads = get_all_uploads_metadata()
+    print(f"All uploads after bulk add: {json.dumps(all_uploads, indent=2)}")
+    assert [record["stored_filename"] for record in all_uploads] == ["def456.png", "ghi789.jpg"]
+    assert all_uploads[0]["original_filename"] == "another-copy.png"
+    
+    # Test 9: Remove several files at once
+    print("\n9. Testing remove_upload_metadata_bulk...")
+    removed = remove_upload_metadata_bulk(["def456.png", "ghi789.jpg", "nonexistent.jpg"])
+    print(f"Bulk remove result: {removed}")
+    assert removed == 2
+    assert get_all_uploads_metadata() == []
+    
     # Verify final metadata file exists
-    print(f"\n8. Final verification - metadata file exists: {METADATA_FILE_PATH.exists()}")
+    print(f"\n10. Final verification - metadata file exists: {METADATA_FILE_PATH.exists()}")
     if METADATA_FILE_PATH.exists():
         with open(METADATA_FILE_PATH, 'r') as f:
             final_content = f.read()
@@ -83,5 +106,63 @@ def test_metadata_functionality():
     
     print("\nMetadata functionality test completed!")
 
+def test_concurrent_metadata_updates():
+    """Test that updates from concurrent worker threads don't lose records."""
+    print("Testing concurrent metadata updates...")
+    
+    with temp_storage():
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for i in range(50):
+                executor.submit(add_upload_metadata, f"image-{i}.jpg", f"hash{i}.jpg", i)
+        
+        stored = sorted(record["stored_filename"] for record in get_all_uploads_metadata())
+        assert stored == sorted(f"hash{i}.jpg" for i in range(50))
+    
+    print("Concurrent metadata update test completed!")
+
+def test_metadata_cache():
+    """Test that cached metadata picks up later writes and is never modified by them."""
+    print("Testing metadata cache...")
+    
+    with temp_storage() as temp_path:
+        add_upload_metadata("first.jpg", "aaa.jpg", 1)
+        add_upload_metadata("second.jpg", "bbb.jpg", 2)
+        
+        def cache_current_file():
+            backdate(metadata.METADATA_FILE_PATH)
+            cached = get_metadata()
+            assert get_metadata() is cached
+            return cached, json.loads(json.dumps(cached))
+        
+        # Mutators work on a fresh parse, never on the shared cached dict
+        cached, snapshot = cache_current_file()
+        assert metadata.read_metadata_file() is not cached
+        add_upload_metadata("third.jpg", "ccc.jpg", 3)
+        assert cached == snapshot
+        assert [record["stored_filename"] for record in get_all_uploads_metadata()] == ["aaa.jpg", "bbb.jpg", "ccc.jpg"]
+        
+        cached, snapshot = cache_current_file()
+        assert metadata.update_objects_metadata("aaa.jpg", [{"label": "cat"}])
+        assert cached == snapshot
+        assert get_file_metadata("aaa.jpg")["objects"] == [{"label": "cat"}]
+        
+        cached, snapshot = cache_current_file()
+        assert remove_upload_metadata_bulk(["bbb.jpg"]) == 1
+        assert cached == snapshot
+        assert get_file_metadata("bbb.jpg") is None
+        
+        # Another file with the same mtime and size is not mistaken for the cached one
+        cache_current_file()
+        other_path = temp_path / "other-metadata.json"
+        other_path.write_bytes(metadata.METADATA_FILE_PATH.read_bytes().replace(b"aaa.jpg", b"zzz.jpg"))
+        stat = os.stat(metadata.METADATA_FILE_PATH)
+        os.utime(other_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        metadata.METADATA_FILE_PATH = other_path
+        assert get_file_metadata("zzz.jpg") is not None
+    
+    print("Metadata cache test completed!")
+
 if __name__ == "__main__":
-    test_metadata_functionality()
\ No newline at end of file
+    test_metadata_functionality()
+    test_concurrent_metadata_updates()
+    test_metadata_cache()
@@ -0,0 +1,155 @@
+"""
+Test script for the upload functionality.
+
+This script tests saving uploaded files with MD5 hash filenames, using a
+temporary directory so the real uploads directory and metadata are untouched.
+"""
+
+import asyncio
+import hashlib
+import io
+
+from fastapi import HTTPException, UploadFile
+
+from app.routes import upload
+from app.utils import metadata
+from testing_helpers import backdate, temp_storage
+
+
+def make_upload(filename: str, content: bytes) -> UploadFile:
+    """Build an UploadFile backed by an in-memory buffer."""
+    return UploadFile(file=io.BytesIO(content), filename=filename)
+
+
+def test_save_file():
+    """Test that uploads are streamed to disk under their MD5 hash."""
+    with temp_storage():
+        # Larger than one chunk so the streaming loop runs more than once
+        content = b"x" * (upload.UPLOAD_CHUNK_SIZE + 123)
+        expected_hash = hashlib.md5(content).hexdigest()
+
+        file_info = asyncio.run(upload.save_file(make_upload("Photo.JPG", content)))
+        print(f"First upload: {file_info}")
+
+        assert file_info["file_hash"] == expected_hash
+        assert file_info["saved_filename"] == f"{expected_hash}.jpg"
+        assert file_info["size"] == len(content)
+        assert file_info["was_duplicate"] is False
+        assert (upload.UPLOAD_DIR / file_info["saved_filename"]).read_bytes() == content
+
+        # Uploading the same content again is reported as a duplicate
+        file_info = asyncio.run(upload.save_file(make_upload("copy.jpg", content)))
+        print(f"Second upload: {file_info}")
+        assert file_info["was_duplicate"] is True
+
+        # No temporary files are left behind
+        leftovers = [p.name for p in upload.UPLOAD_DIR.iterdir() if p.name.startswith(upload.TEMP_FILE_PREFIX)]
+        assert leftovers == []
+
+        records = metadata.get_all_uploads_metadata()
+        assert len(records) == 1
+        assert records[0]["original_filename"] == "copy.jpg"
+
+    print("✅ save_file test passed!")
+
+
+def test_upload_file_duplicates():
+    """Test that re-uploaded content is reported as already stored."""
+    with temp_storage():
+        result = asyncio.run(upload.upload_file([make_upload("a.jpg", b"same")]))
+        assert result["duplicates_count"] == 0
+        assert result["message"] == "Successfully uploaded 1 file"
+
+        result = asyncio.run(upload.upload_file([make_upload("b.jpg", b"same"), make_upload("c.jpg", b"other")]))
+        print(f"Second upload message: {result['message']}")
+        assert [file_info["was_duplicate"] for file_info in result["files"]] == [True, False]
+        assert result["duplicates_count"] == 1
+        assert result["message"] == "Successfully uploaded 2 files (1 duplicate already stored)"
+
+    print("✅ upload_file duplicates test passed!")
+
+
+def test_upload_dir_listing_cache():
+    """Test that the cached directory listing picks up later writes."""
+    with temp_storage():
+        asyncio.run(upload.save_file(make_upload("first.jpg", b"first")))
+
+        backdate(upload.UPLOAD_DIR)
+        cached = upload.get_upload_dir_listing()
+        assert upload.get_upload_dir_listing() is cached
+        assert len(cached) == 1
+
+        # A write after the cached read is seen, and the cached listing is left untouched
+        asyncio.run(upload.save_file(make_upload("second.jpg", b"second")))
+        listing = upload.get_upload_dir_listing()
+        print(f"Listing after second upload: {[file['filename'] for file in listing]}")
+        assert len(listing) == 2
+        assert len(cached) == 1
+
+        # A directory modified within the last second is rescanned on every call
+        assert upload.get_upload_dir_listing() is not listing
+
+    print("✅ Upload directory listing cache test passed!")
+
+
+def test_delete_files():
+    """Test that deleting files removes them from disk and from the metadata."""
+    with temp_storage():
+        result = asyncio.run(upload.upload_file([make_upload("a.jpg", b"a"), make_upload("b.jpg", b"b")]))
+        saved = [file_info["saved_filename"] for file_info in result["files"]]
+
+        request = upload.DeleteFilesRequest(filenames=[saved[0], "missing.jpg"])
+        result = asyncio.run(upload.delete_files(request))
+        print(f"Delete result: {result['message']}")
+        assert result["deleted_files"] == [saved[0]]
+        assert result["not_found_files"] == ["missing.jpg"]
+        assert not (upload.UPLOAD_DIR / saved[0]).exists()
+        assert [record["stored_filename"] for record in metadata.get_all_uploads_metadata()] == [saved[1]]
+
+    print("✅ delete_files test passed!")
+
+
+class FailingReader(io.RawIOBase):
+    """File object whose reads fail, standing in for a broken upload stream."""
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        raise OSError("Simulated read error")
+
+
+def test_upload_file_partial_failure():
+    """Test that files saved alongside a failing upload still get their metadata."""
+    with temp_storage():
+        files = [
+            make_upload("first.jpg", b"first"),
+            UploadFile(file=io.BufferedReader(FailingReader()), filename="broken.jpg"),
+            make_upload("third.jpg", b"third"),
+        ]
+
+        try:
+            asyncio.run(upload.upload_file(files))
+        except HTTPException as e:
+            print(f"Upload failed as expected: {e.detail}")
+            assert e.status_code == 500
+            assert "Simulated read error" in e.detail
+        else:
+            raise AssertionError("Expected the upload to fail")
+
+        stored = sorted(p.name for p in upload.UPLOAD_DIR.iterdir() if p.suffix == ".jpg")
+        assert stored == sorted(f"{hashlib.md5(content).hexdigest()}.jpg" for content in (b"first", b"third"))
+
+        records = metadata.get_all_uploads_metadata()
+        assert sorted(record["original_filename"] for record in records) == ["first.jpg", "third.jpg"]
+        assert sorted(record["stored_filename"] for record in records) == stored
+
+    print("✅ upload_file partial failure test passed!")
+
+
+if __name__ == "__main__":
+    test_save_file()
+    test_upload_file_duplicates()
+    test_upload_dir_listing_cache()
+    test_delete_files()
+    test_upload_file_partial_failure()
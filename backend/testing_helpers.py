@@ -0,0 +1,63 @@
+"""
+Helpers shared by the test scripts.
+
+temp_storage() points the uploads directory, the metadata file and the
+detection cache at a temporary directory, so tests never touch the real files.
+"""
+
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from app.routes import detection, upload
+from app.utils import detection_cache, json_files, metadata
+
+
+@contextmanager
+def temp_storage():
+    """
+    Redirect upload, metadata and detection cache storage to a temporary directory.
+
+    The original paths are restored and the in-memory caches cleared afterwards.
+
+    Yields:
+        Path: The temporary directory, with the uploads directory inside it
+    """
+    originals = (
+        upload.UPLOAD_DIR, detection.UPLOAD_DIR,
+        metadata.METADATA_FILE_PATH, detection_cache.DETECTION_CACHE_FILE_PATH
+    )
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        upload_dir = temp_path / "uploads"
+        upload_dir.mkdir()
+
+        upload.UPLOAD_DIR = upload_dir
+        detection.UPLOAD_DIR = upload_dir
+        metadata.METADATA_FILE_PATH = temp_path / "uploads-metadata.json"
+        detection_cache.DETECTION_CACHE_FILE_PATH = temp_path / "detections-cache.json"
+        upload._upload_dir_cache = None
+        json_files._json_cache.clear()
+        try:
+            yield temp_path
+        finally:
+            (
+                upload.UPLOAD_DIR, detection.UPLOAD_DIR,
+                metadata.METADATA_FILE_PATH, detection_cache.DETECTION_CACHE_FILE_PATH
+            ) = originals
+            upload._upload_dir_cache = None
+            json_files._json_cache.clear()
+
+
+def backdate(path: Path) -> None:
+    """
+    Move a file's or directory's mtime a few seconds into the past.
+
+    The mtime-keyed caches skip anything modified within the last second, so
+    tests backdate the files they want the caches to keep.
+    """
+    past = time.time_ns() - 5_000_000_000
+    os.utime(path, ns=(past, past))